@@ -2,10 +2,12 @@
 
 """trie module example code."""
 
+from __future__ import print_function
+
 __author__ = 'Michal Nazarewicz <mina86@mina86.com>'
 __copyright__ = 'Copyright 2014 Google Inc.'
 
-# pylint: disable=invalid-name,superfluous-parens
+# pylint: disable=invalid-name
 
 import os
 import stat
@@ -13,6 +15,12 @@ import sys
 
 import pygtrie
 
+try:
+    from concurrent.futures import ThreadPoolExecutor
+    scandir = os.scandir
+except (ImportError, AttributeError):
+    scandir = None  # Python 2
+
 
 print('Storing file information in the trie')
 print('====================================\n')
@@ -22,24 +30,90 @@ SUB_DIR = os.path.join(ROOT_DIR, 'lib')
 SUB_DIRS = tuple(os.path.join(ROOT_DIR, d)
                  for d in ('lib', 'lib32', 'lib64', 'share'))
 
-t = pygtrie.StringTrie(separator=os.path.sep)
-
-# Read sizes regular files into a Trie
-for dirpath, unused_dirnames, filenames in os.walk(ROOT_DIR):
-    for filename in filenames:
-        filename = os.path.join(dirpath, filename)
+# Bits of st_mode which stat.S_IFMT extracts.  Masking them inline saves
+# a function call per file.
+IFMT_MASK = 0o170000
+IFREG = stat.S_IFREG
+
+
+def walk_file_sizes(root):
+    """Yields (path, size) pairs for all regular files under root."""
+    # Concatenating with a separator gives the same result as the (much
+    # slower) os.path.join for the paths os.walk yields.
+    sep, do_stat = os.path.sep, os.stat
+    for dirpath, unused_dirnames, filenames in os.walk(root):
+        if not dirpath.endswith(sep):
+            dirpath += sep
+        for filename in filenames:
+            filename = dirpath + filename
+            try:
+                filestat = do_stat(filename)
+            except OSError:
+                continue
+            if (filestat.st_mode & IFMT_MASK) == IFREG:
+                yield filename, filestat.st_size
+
+
+def regular_file_size(entry):
+    """Returns size of a file if entry is a regular file; None otherwise."""
+    try:
+        filestat = entry.stat()
+    except OSError:
+        return None
+    if (filestat.st_mode & IFMT_MASK) == IFREG:
+        return filestat.st_size
+    return None
+
+
+def scan_file_sizes(root, max_workers=16):
+    """Yields (path, size) pairs for all regular files under root.
+
+    Unlike walk_file_sizes, uses directory entries returned by scandir which
+    already know their type and full path and may have the stat result cached
+    so the file system is not asked about each file twice.
+
+    Listing directories is cheap so it's done first, but the stat calls which
+    may need to wait for the disk are spread across a pool of threads so that
+    they overlap.
+    """
+    entries = []
+    dirs = [root]
+    while dirs:
         try:
-            filestat = os.stat(filename)
+            dir_entries = scandir(dirs.pop())
         except OSError:
             continue
-        if stat.S_IFMT(filestat.st_mode) == stat.S_IFREG:
-            t[filename] = filestat.st_size
-
-# Size of all files we've scanned
-print('Size of %s: %d' % (ROOT_DIR, sum(t.itervalues())))
+        for entry in dir_entries:
+            if entry.is_dir(follow_symlinks=False):
+                dirs.append(entry.path)
+            else:
+                entries.append(entry)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        sizes = executor.map(regular_file_size, entries)
+        for entry, size in zip(entries, sizes):
+            if size is not None:
+                yield entry.path, size
+
+
+iter_file_sizes = scan_file_sizes if scandir else walk_file_sizes
+
+# Read sizes regular files into a Trie.  Passing all the pairs to the
+# constructor at once lets the trie reuse the nodes walked for the previous
+# file instead of descending from the root for every file.  Sorting the pairs
+# maximises the shared part of consecutive paths.  Directory names such as
+# lib or include repeat throughout the tree so have them interned.
+file_sizes = sorted(iter_file_sizes(ROOT_DIR))
+t = pygtrie.StringTrie(file_sizes, separator=os.path.sep, intern=True)
+
+# Size of all files we've scanned.  A trie is not needed for that; summing the
+# list avoids walking all of trie's nodes.
+total_size = sum(size for _, size in file_sizes)
+print('Size of %s: %d' % (ROOT_DIR, total_size))
 
 # Size of all files of a sub-directory
-print('Size of %s: %d' % (SUB_DIR, sum(t.itervalues(prefix=SUB_DIR))))
+sub_dir_size = sum(t.itervalues(prefix=SUB_DIR))
+print('Size of %s: %d' % (SUB_DIR, sub_dir_size))
 
 # Check existence of some directories
 for directory in SUB_DIRS:
@@ -48,7 +122,9 @@ for directory in SUB_DIRS:
 # Drop a subtrie
 print('Dropping', SUB_DIR)
 del t[SUB_DIR:]
-print('Size of %s: %d' % (ROOT_DIR, sum(t.itervalues())))
+# No need to go through the whole trie again; only the dropped subtrie changed.
+total_size -= sub_dir_size
+print('Size of %s: %d' % (ROOT_DIR, total_size))
 for directory in SUB_DIRS:
     print(directory, 'exists' if t.has_subtrie(directory) else 'does not exist')
 
@@ -56,6 +132,8 @@ for directory in SUB_DIRS:
 print('\nStoring URL handlers map')
 print('========================\n')
 
+# With only four handlers, probing a dict with url[:i] for decreasing i would
+# do as well; a trie scales to large routing tables though.
 t = pygtrie.CharTrie()
 t['/'] = lambda url: sys.stdout.write('Root handler: %s\n' % url)
 t['/foo'] = lambda url: sys.stdout.write('Foo handler: %s\n' % url)
@@ -107,24 +185,28 @@ ps.add('/usr/lib')  # Does not change anything
 
 print('Path prefixes:', ', '.join(iter(ps)))
 for path in ('/etc', '/etc/rc.d', '/usr', '/usr/local', '/usr/local/lib'):
-    print('Is', path, 'in the set:', ('yes' if path in ps else 'no'))
+    prefix = ps.covering_prefix(path)
+    print('Is', path, 'in the set:',
+          ('yes (via %s)' % prefix if prefix is not None else 'no'))
 
 
 print('\nDictionary test')
 print('===============\n')
 
-t = pygtrie.CharTrie()
-t['cat'] = True
-t['caterpillar'] = True
-t['car'] = True
-t['bar'] = True
+# The list of words is known up front so there is no need to go through
+# the trie and sort its keys to show them to the user.
+words = ('bar', 'car', 'cat', 'caterpillar')
+t = pygtrie.CharTrie.fromkeys(words, True)
 t['exit'] = False
 
 print('Start typing a word, "exit" to stop')
-print('(Other words you might want to try: %s)\n' % ', '.join(sorted(
-    k for k in t if k != 'exit')))
+print('(Other words you might want to try: %s)\n' % ', '.join(words))
 
+# Rather than looking up the whole text after each key press, the walker
+# takes one step down the trie per character.
 text = ''
+walker = t.prefix_walker()
+next(walker)
 while True:
     ch = getch()
     if ord(ch) < 32:
@@ -132,14 +214,21 @@ while True:
         break
 
     text += ch
-    value = t.get(text)
-    if value is False:
-        print('Exiting')
-        break
-    if value is not None:
-        print(repr(text), 'is a word')
-    if t.has_subtrie(text):
-        print(repr(text), 'is a prefix of a word')
+    node, value = walker.send(ch)
+    # Collect everything there is to say about the key press and write it out
+    # in one go rather than flushing the terminal after every line.
+    lines = []
+    if node & pygtrie.Trie.HAS_VALUE:
+        if not value:
+            print('Exiting')
+            break
+        lines.append('%r is a word' % text)
+    if node & pygtrie.Trie.HAS_SUBTRIE:
+        lines.append('%r is a prefix of a word' % text)
     else:
-        print(repr(text), 'is not a prefix, going back to empty string')
+        lines.append('%r is not a prefix, going back to empty string' % text)
         text = ''
+        walker = t.prefix_walker()
+        next(walker)
+    sys.stdout.write('\n'.join(lines) + '\n')
+    sys.stdout.flush()
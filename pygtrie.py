@@ -45,7 +45,6 @@ import collections as _collections
 if hasattr(dict, 'iteritems'):
     # pylint: disable=invalid-name
     _iteritems = lambda d: d.iteritems()
-    _iterkeys = lambda d: d.iterkeys()
     def _sorted_iteritems(d):
         """Returns d's items in sorted order."""
         items = d.items()
@@ -54,13 +53,27 @@ if hasattr(dict, 'iteritems'):
 else:
     _sorted_iteritems = lambda d: sorted(d.items())  # pylint: disable=invalid-name
     _iteritems = lambda d: iter(d.items())  # pylint: disable=invalid-name
-    _iterkeys = lambda d: iter(d.keys())  # pylint: disable=invalid-name
+
+# Python 2.6 has no OrderedDict.  There, PrefixSet's cache evicts arbitrary
+# entries rather than the least recently used ones.
+_OrderedDict = getattr(_collections, 'OrderedDict', dict)
 
 try:
     _basestring = basestring
 except NameError:
     _basestring = str
 
+try:
+    _py2_intern = intern
+except NameError:
+    from sys import intern as _intern
+else:
+    def _intern(step):
+        """Interns a string.  Python 2 can intern byte strings only."""
+        # Exact type check: str subclasses cannot be interned on Python 2.
+        # pylint: disable=unidiomatic-typecheck
+        return _py2_intern(step) if type(step) is str else step
+
 
 class ShortKeyError(KeyError):
     """Raised when given key is a prefix of a longer key."""
@@ -70,15 +83,174 @@ class ShortKeyError(KeyError):
 _SENTINEL = object()
 
 
+class _Children(dict):
+    """Children of a node with two or more of them; a dictionary mapping steps
+    to child nodes."""
+    __slots__ = ()
+
+    def add(self, _parent, step):
+        """Creates a child for a step not yet present.
+
+        Args:
+            _parent: Node the children belong to.  Its ``children`` attribute
+                is updated if a different representation is needed.
+            step: Step leading to the new child.
+
+        Returns:
+            The new child node.
+        """
+        node = self[step] = _Node()
+        return node
+
+    def delete(self, parent, step):
+        """Removes child for given step.
+
+        Args:
+            parent: Node the children belong to.  If only one child remains
+                after the removal, its ``children`` attribute is replaced with
+                a :class:`_OneChild` object.
+            step: Step leading to the child to remove.
+        """
+        del self[step]
+        if len(self) == 1:
+            parent.children = _OneChild(*self.popitem())
+
+
+class _OneChild(object):
+    """Children of a node which has exactly one child.
+
+    Away from the root, most internal nodes have a single child.  Holding that
+    child directly takes a fraction of the memory a dictionary would need.
+    The object behaves like a :class:`_Children` dictionary with one element.
+    """
+    __slots__ = ('step', 'node')
+
+    def __init__(self, step, node):
+        self.step = step
+        self.node = node
+
+    def __bool__(self):  # pylint: disable=no-self-use
+        return True
+
+    __nonzero__ = __bool__
+
+    def __len__(self):  # pylint: disable=no-self-use
+        return 1
+
+    def __iter__(self):
+        return iter((self.step,))
+
+    iterkeys = __iter__
+
+    def iteritems(self):
+        """Returns an iterator over the single ``(step, node)`` pair."""
+        return iter(((self.step, self.node),))
+
+    def items(self):
+        """Returns a list with the single ``(step, node)`` pair."""
+        return [(self.step, self.node)]
+
+    def keys(self):
+        """Returns a list with the single step."""
+        return [self.step]
+
+    def get(self, step, default=None):
+        """Returns the child if ``step`` matches, ``default`` otherwise."""
+        # Like dict, check identity first so that steps which are not equal to
+        # themselves (such as NaN) can still be found.
+        own = self.step
+        if step is own or step == own:
+            return self.node
+        hash(step)  # Unhashable steps raise TypeError as with a dictionary.
+        return default
+
+    def __getitem__(self, step):
+        own = self.step
+        if step is own or step == own:
+            return self.node
+        hash(step)
+        raise KeyError(step)
+
+    def add(self, parent, step):
+        """Creates a child; see :func:`_Children.add`."""
+        # Fill the dictionary before installing it so that the existing child
+        # is not lost if step turns out not to be hashable.
+        children = _Children()
+        children[self.step] = self.node
+        node = children[step] = _Node()
+        parent.children = children
+        return node
+
+    def delete(self, parent, _step):  # pylint: disable=no-self-use
+        """Removes the only child; see :func:`_Children.delete`."""
+        parent.children = _EMPTY
+
+
+class _NoChildren(object):
+    """Children of a node which has none.
+
+    Most of trie's nodes are leaves.  Rather than each of them holding its own
+    empty dictionary, they all share a single ``_EMPTY`` instance of this class
+    which behaves like an empty read-only :class:`_Children` object.
+
+    Which of the three classes holds a node's children depends on how many
+    there are.  Their ``add`` and ``delete`` methods install the right
+    representation in the parent node, so code adding or removing children
+    must use them rather than modify the object in place.
+    """
+    __slots__ = ()
+
+    def __bool__(self):  # pylint: disable=no-self-use
+        return False
+
+    __nonzero__ = __bool__
+
+    def __len__(self):  # pylint: disable=no-self-use
+        return 0
+
+    def __iter__(self):  # pylint: disable=no-self-use
+        return iter(())
+
+    iteritems = iterkeys = __iter__
+
+    def get(self, step, default=None):  # pylint: disable=no-self-use
+        """Returns ``default`` since there are no children."""
+        hash(step)  # Unhashable steps raise TypeError as with a dictionary.
+        return default
+
+    def __getitem__(self, step):  # pylint: disable=no-self-use
+        hash(step)
+        raise KeyError(step)
+
+    def items(self):  # pylint: disable=no-self-use
+        """Returns an empty list."""
+        return []
+
+    keys = items
+
+    def add(self, parent, step):  # pylint: disable=no-self-use
+        """Creates a child; see :func:`_Children.add`."""
+        # _OneChild never hashes its step; make sure a dictionary could.
+        hash(step)
+        children = parent.children = _OneChild(step, None)
+        node = children.node = _Node()
+        return node
+
+
+_EMPTY = _NoChildren()
+
+
 class _Node(object):
     """A single node of a trie.
 
-    Stores value associated with the node and dictionary of children.
+    Stores value associated with the node and its children.  The latter is
+    a :class:`_Children` dictionary, a :class:`_OneChild` object or the shared
+    ``_EMPTY`` object depending on how many children the node has.
     """
     __slots__ = ('children', 'value')
 
     def __init__(self):
-        self.children = {}
+        self.children = _EMPTY
         self.value = _SENTINEL
 
     def iterate(self, path, shallow, iteritems):
@@ -97,27 +269,87 @@ class _Node(object):
             ``(path, value)`` tuples.
         """
         # Use iterative function with stack on the heap so we don't hit Python's
-        # recursion depth limits.
+        # recursion depth limits.  Only nodes with two or more children are
+        # put on the stack, together with the length of the path leading to
+        # their children.  Chains of single children, which make up most of
+        # a typical trie, are followed directly.
+        # Globals are bound to locals since this loop runs once for every node.
+        sentinel, empty, one_child = _SENTINEL, _EMPTY, _OneChild
         node = self
         stack = []
+        push = stack.append
         while True:
-            if node.value is not _SENTINEL:
-                yield path, node.value
-
-            if (not shallow or node.value is _SENTINEL) and node.children:
-                stack.append(iter(iteritems(node.children)))
-                path.append(None)
+            value = node.value
+            if value is not sentinel:
+                yield path, value
+
+            children = node.children
+            if children is not empty and (not shallow or value is sentinel):
+                # _OneChild is never subclassed and an exact type check is
+                # cheaper than isinstance on this hot path.  pylint cannot see
+                # that the check narrows the type of children.
+                # pylint: disable=unidiomatic-typecheck,no-member
+                if type(children) is one_child:
+                    path.append(children.step)
+                    node = children.node
+                    continue
+                push((iter(iteritems(children)), len(path)))
 
-            while True:
-                try:
-                    step, node = next(stack[-1])
-                    path[-1] = step
+            while stack:
+                items, depth = stack[-1]
+                for step, node in items:
+                    del path[depth:]
+                    path.append(step)
                     break
-                except StopIteration:
+                else:
                     stack.pop()
-                    path.pop()
-                except IndexError:
-                    return
+                    continue
+                break
+            else:
+                return
+
+    def iterate_values(self, shallow, iteritems):
+        """Yields values of all the nodes with values associated to them.
+
+        Works like :func:`_Node.iterate` except that paths to the nodes are not
+        tracked.
+
+        Args:
+            shallow: Perform a shallow traversal, i.e. do not yield nodes if
+                their prefix has been yielded.
+            iteritems: A function taking dictionary as argument and returning
+                iterator over its items.
+
+        Yields:
+            Values of the nodes.
+        """
+        sentinel, empty, one_child = _SENTINEL, _EMPTY, _OneChild
+        node = self
+        stack = []
+        push, pop = stack.append, stack.pop
+        while True:
+            value = node.value
+            if value is not sentinel:
+                yield value
+
+            children = node.children
+            if children is not empty and (not shallow or value is sentinel):
+                # See iterate for why the type is checked exactly.
+                # pylint: disable=unidiomatic-typecheck,no-member
+                if type(children) is one_child:
+                    node = children.node
+                    continue
+                push(iter(iteritems(children)))
+
+            while stack:
+                for _, node in stack[-1]:
+                    break
+                else:
+                    pop()
+                    continue
+                break
+            else:
+                return
 
     def traverse(self, node_factory, path_conv, path, iteritems):
         """Traverses the node and returns another type of node from factory.
@@ -125,7 +357,7 @@ class _Node(object):
         Args:
             node_factory: Callable function to construct new nodes.
             path_conv: Callable function to convert node path to a key.
-            path: Current path for this node.
+            path: Current path for this node as a tuple.
             iteritems: A function taking dictionary as argument and returning
                 iterator over its items.  Something other than dict.iteritems
                 may be given to enable sorting.
@@ -137,13 +369,17 @@ class _Node(object):
             correspondence between original nodes in the trie and constructed
             nodes (see make_test_node_and_compress in test.py).
         """
+        # Children are traversed lazily, only as node_factory iterates over
+        # them, so the recursion can't be replaced by a bottom-up walk.  Leaves
+        # get an empty iterator rather than a generator of their own.
         def children():
             """Recursively traverses all of node's children."""
             for step, node in iteritems(self.children):
-                yield node.traverse(node_factory, path_conv, path + [step],
+                yield node.traverse(node_factory, path_conv, path + (step,),
                                     iteritems)
 
-        args = [path_conv, tuple(path), children()]
+        args = [path_conv, path,
+                iter(()) if self.children is _EMPTY else children()]
 
         if self.value is not _SENTINEL:
             args.append(self.value)
@@ -157,20 +393,22 @@ class _Node(object):
         while True:
             if a.value != b.value or len(a.children) != len(b.children):
                 return False
-            if a.children:
+            if a.children is not _EMPTY:
                 stack.append((_iteritems(a.children), b.children))
 
-            while True:
-                try:
-                    key, a = next(stack[-1][0])
-                    b = stack[-1][1].get(key)
-                    if b is None:
-                        return False
+            while stack:
+                items, b_children = stack[-1]
+                for key, a in items:
                     break
-                except StopIteration:
+                else:
                     stack.pop()
-                except IndexError:
-                    return True
+                    continue
+                b = b_children.get(key)
+                if b is None:
+                    return False
+                break
+            else:
+                return True
 
         return self.value == other.value and self.children == other.children
 
@@ -231,12 +469,14 @@ class _Node(object):
             if node.value is not _SENTINEL:
                 last_cmd = 0
                 state.append(node.value)
-            stack.append(_iteritems(node.children))
+            # Leaves, the most common nodes, need no iterator of their own.
+            children = node.children
+            stack.append(() if children is _EMPTY else _iteritems(children))
 
-            while True:
-                try:
-                    step, node = next(stack[-1])
-                except StopIteration:
+            while stack:
+                for step, node in stack[-1]:
+                    break
+                else:
                     if last_cmd < 0:
                         state[-1] -= 1
                     else:
@@ -244,10 +484,6 @@ class _Node(object):
                         state.append(-1)
                     stack.pop()
                     continue
-                except IndexError:
-                    if last_cmd < 0:
-                        state.pop()
-                    return state
 
                 if last_cmd > 0:
                     last_cmd += 1
@@ -257,6 +493,10 @@ class _Node(object):
                     state.append(1)
                 state.append(step)
                 break
+            else:
+                if last_cmd < 0:
+                    state.pop()
+                return state
 
     def __setstate__(self, state):
         """Unpickles node.  See :func:`_Node.__getstate__`."""
@@ -268,8 +508,11 @@ class _Node(object):
                 del stack[cmd:]
             else:
                 while cmd > 0:
-                    stack.append(type(self)())
-                    stack[-2].children[next(state)] = stack[-1]
+                    parent, step = stack[-1], next(state)
+                    node = parent.children.get(step)
+                    if node is None:
+                        node = parent.children.add(parent, step)
+                    stack.append(node)
                     cmd -= 1
                 stack[-1].value = next(state)
 
@@ -294,6 +537,12 @@ class Trie(_collections.MutableMapping):
     :class:`pygtrie.StringTrie` may be preferred when using
     :class:`pygtrie.Trie` with string keys.
     """
+    # On Python 2 the abstract base classes have no __slots__ so instances get
+    # __weakref__ (as well as __dict__) from them; on Python 3 it has to be
+    # requested explicitly.
+    __slots__ = ('_root', '_size', '_sorted') + (
+        () if hasattr(_collections.MutableMapping, '__weakref__')
+        else ('__weakref__',))
 
     def __init__(self, *args, **kwargs):
         """Initialises the trie.
@@ -302,20 +551,35 @@ class Trie(_collections.MutableMapping):
         them.
         """
         self._root = _Node()
+        self._size = 0
         self._sorted = False
         self.update(*args, **kwargs)
 
-    @property
-    def _iteritems(self):
-        """Returns function yielding over dict's items possibly in sorted order.
+    def __getstate__(self):
+        """Get state used for pickling.
+
+        Trie and its subclasses store their attributes in slots, so the state
+        is a dictionary built the same way as an instance's ``__dict__``.  This
+        is also the format used by tries pickled before slots were introduced.
 
         Returns:
-            A function iterating over items of a dictionary given as an
-            argument. If child nodes sorting has been enabled (via
-            :func:`Trie.enable_sorting` method), returned function will go
-            through the items in sorted order..
+            A dictionary mapping attribute names to their values.
         """
-        return _sorted_iteritems if self._sorted else _iteritems
+        state = dict(getattr(self, '__dict__', ()))
+        for cls in type(self).__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if name != '__weakref__' and hasattr(self, name):
+                    state[name] = getattr(self, name)
+        return state
+
+    def __setstate__(self, state):
+        """Unpickles trie.  See :func:`Trie.__getstate__`."""
+        for name, value in _iteritems(state):
+            setattr(self, name, value)
+        if '_size' not in state:
+            # Tries pickled by versions which did not count their values.
+            self._size = sum(1 for _ in self._root.iterate_values(
+                False, _iteritems))
 
     def enable_sorting(self, enable=True):
         """Enables sorting of child nodes when iterating and traversing.
@@ -343,9 +607,18 @@ class Trie(_collections.MutableMapping):
     def clear(self):
         """Removes all the values from the trie."""
         self._root = _Node()
+        self._size = 0
 
     def update(self, *args, **kwargs):
-        """Updates stored values.  Works like :func:`dict.update`."""
+        """Updates stored values.  Works like :func:`dict.update`.
+
+        When given an iterable of ``(key, value)`` pairs, the trie is walked
+        only from the point where a key diverges from the previous one.
+        Building a trie is therefore cheapest when keys sharing a prefix come
+        one after another, for example when the pairs are sorted by key.
+        Nodes are then also created in the same order later iteration over
+        the trie visits them.
+        """
         if len(args) > 1:
             raise ValueError('update() takes at most one positional argument, '
                              '%d given.' % len(args))
@@ -355,11 +628,61 @@ class Trie(_collections.MutableMapping):
         # to the node would have to be walked twice.  Instead, we have our own
         # implementation where iteritems() is used avoiding the unnecessary
         # value look-up.
-        if args and isinstance(args[0], Trie):
-            for key, value in _iteritems(args[0]):
-                self[key] = value
-            args = ()
-        super(Trie, self).update(*args, **kwargs)
+        if args:
+            arg = args[0]
+            # Subclasses of dict may override items() or __getitem__ so read
+            # items directly only from plain dictionaries and go through the
+            # generic mapping path for everything else.
+            # pylint: disable=unidiomatic-typecheck
+            if type(arg) is dict or isinstance(arg, Trie):
+                self._merge_items(_iteritems(arg))
+            elif hasattr(arg, 'keys'):
+                super(Trie, self).update(arg)
+            else:
+                self._merge_items(arg)
+        if kwargs:
+            self._merge_items(_iteritems(kwargs))
+
+    def _merge_items(self, items):
+        """Sets values of keys from an iterable of ``(key, value)`` pairs.
+
+        Args:
+            items: An iterable of ``(key, value)`` pairs.
+        """
+        path_from_key = self._path_from_key
+        self._merge_paths((path_from_key(key), value) for key, value in items)
+
+    def _merge_paths(self, items):
+        """Sets values of paths from an iterable of ``(path, value)`` pairs.
+
+        Rather than descending from the root for each path, the nodes visited
+        for the previous path are remembered and the walk resumes from the
+        deepest node the two paths have in common.  This makes bulk loading
+        cheaper whenever consecutive keys share a prefix.
+
+        Args:
+            items: An iterable of ``(path, value)`` pairs where each path is
+                a key already converted with :func:`Trie._path_from_key`.
+        """
+        trace = [self._root]
+        prev = ()
+        for path, value in items:
+            path = tuple(path)
+            common = 0
+            limit = min(len(path), len(prev))
+            while common < limit and path[common] == prev[common]:
+                common += 1
+            del trace[common + 1:]
+            node = trace[-1]
+            for step in path[common:]:
+                children = node.children
+                child = None if children is _EMPTY else children.get(step)
+                node = children.add(node, step) if child is None else child
+                trace.append(node)
+            if node.value is _SENTINEL:
+                self._size += 1
+            node.value = value
+            prev = path
 
     def copy(self):
         """Returns a shallow copy of the trie."""
@@ -381,17 +704,49 @@ class Trie(_collections.MutableMapping):
             value.
         """
         trie = cls()
-        for key in keys:
-            trie[key] = value
+        trie._merge_items((key, value) for key in keys)
         return trie
 
-    def _get_node(self, key, create=False):
+    def _find_node(self, key, create=False):
         """Returns node for given key.  Creates it if requested.
 
         Args:
-            key: A key to look for.
+            key: A key to look for or ``_SENTINEL`` for the root node.
             create: Whether to create the node if it does not exist.
 
+        Returns:
+            The node for given key.
+
+        Raises:
+            KeyError: If there is no node for the key and ``create`` is
+                ``False``.
+        """
+        node = self._root
+        if key is _SENTINEL:
+            return node
+        path = self._path_from_key(key)
+        if create:
+            for step in path:
+                children = node.children
+                child = None if children is _EMPTY else children.get(step)
+                node = children.add(node, step) if child is None else child
+        else:
+            try:
+                for step in path:
+                    node = node.children[step]
+            except KeyError:
+                raise KeyError(key)
+        return node
+
+    def _get_node(self, key):
+        """Returns node for given key along with path to reach it.
+
+        Only methods which need to remove nodes use this method; others should
+        use :func:`Trie._find_node` which does not record the path.
+
+        Args:
+            key: A key to look for.
+
         Returns:
             ``(node, trace)`` tuple where ``node`` is the node for given key and
             ``trace`` is a list specifying path to reach the node including all
@@ -401,21 +756,45 @@ class Trie(_collections.MutableMapping):
             always ``(None, self._root)``.
 
         Raises:
-            KeyError: If there is no node for the key and ``create`` is
-                ``False``.
+            KeyError: If there is no node for the key.
         """
         node = self._root
         trace = [(None, node)]
-        for step in self.__path_from_key(key):
-            if create:
-                node = node.children.setdefault(step, _Node())
-            else:
-                node = node.children.get(step)
-                if not node:
-                    raise KeyError(key)
-            trace.append((step, node))
+        try:
+            for step in self._path_from_key(key):
+                node = node.children[step]
+                trace.append((step, node))
+        except KeyError:
+            raise KeyError(key)
         return node, trace
 
+    def _find_prefix(self, prefix):
+        """Returns node for given prefix along with path leading to it.
+
+        The prefix is converted into a path only once and the same path is used
+        to find the node and returned to the caller.
+
+        Args:
+            prefix: A key to look for or ``_SENTINEL`` for the root node.
+
+        Returns:
+            ``(node, path)`` tuple where ``node`` is the node for given prefix
+            and ``path`` is a list of steps leading to it.
+
+        Raises:
+            KeyError: If there is no node for the prefix.
+        """
+        node = self._root
+        if prefix is _SENTINEL:
+            return node, []
+        path = list(self._path_from_key(prefix))
+        try:
+            for step in path:
+                node = node.children[step]
+        except KeyError:
+            raise KeyError(prefix)
+        return node, path
+
     def __iter__(self):
         return self.iterkeys()
 
@@ -463,10 +842,11 @@ class Trie(_collections.MutableMapping):
         Raises:
             KeyError: If ``prefix`` does not match any node.
         """
-        node, _ = self._get_node(prefix)
-        for path, value in node.iterate(list(self.__path_from_key(prefix)),
-                                        shallow, self._iteritems):
-            yield (self._key_from_path(path), value)
+        node, path = self._find_prefix(prefix)
+        iteritems = _sorted_iteritems if self._sorted else _iteritems
+        key_from_path = self._key_from_path
+        for path, value in node.iterate(path, shallow, iteritems):
+            yield key_from_path(path), value
 
     def iterkeys(self, prefix=_SENTINEL, shallow=False):
         """Yields all keys having associated values with given prefix.
@@ -505,9 +885,9 @@ class Trie(_collections.MutableMapping):
         Raises:
             KeyError: If ``prefix`` does not match any node.
         """
-        node, _ = self._get_node(prefix)
-        for _, value in node.iterate(list(self.__path_from_key(prefix)),
-                                     shallow, self._iteritems):
+        node = self._find_node(prefix)
+        iteritems = _sorted_iteritems if self._sorted else _iteritems
+        for value in node.iterate_values(shallow, iteritems):
             yield value
 
     def items(self, prefix=_SENTINEL, shallow=False):
@@ -539,12 +919,13 @@ class Trie(_collections.MutableMapping):
     def __len__(self):
         """Returns number of values in a trie.
 
-        Note that this method is expensive as it iterates over the whole trie.
+        The number is kept up to date as values are set and removed so this
+        method does not need to iterate over the trie.
         """
-        return sum(1 for _ in self.itervalues())
+        return self._size
 
     def __nonzero__(self):
-        return bool(self._root)
+        return self._size != 0
 
     HAS_VALUE = 1
     HAS_SUBTRIE = 2
@@ -586,6 +967,9 @@ class Trie(_collections.MutableMapping):
             >>> t.has_key('foo/bar'), t.has_subtrie('foo/bar')
             True, True
 
+        Each of those methods walks the trie on its own.  When both pieces of
+        information are needed, calling this method once is cheaper.
+
         Args:
             key: A key to look for.
 
@@ -594,25 +978,77 @@ class Trie(_collections.MutableMapping):
             it has a value associated with it and whether it has a subtrie.
         """
         try:
-            node, _ = self._get_node(key)
+            node = self._find_node(key)
         except KeyError:
             return 0
-        return ((self.HAS_VALUE * int(node.value is not _SENTINEL)) |
-                        (self.HAS_SUBTRIE * int(bool(node.children))))
+        # HAS_VALUE is 1 and HAS_SUBTRIE is 2, so the booleans can be combined
+        # directly.  Nodes which have children never hold _EMPTY.
+        return ((node.value is not _SENTINEL) |
+                ((node.children is not _EMPTY) << 1))
 
     def has_key(self, key):
         """Indicates whether given key has value associated with it.
 
         See :func:`Trie.has_node` for more detailed documentation.
         """
-        return bool(self.has_node(key) & self.HAS_VALUE)
+        return key in self
 
     def has_subtrie(self, key):
         """Returns whether given key is a prefix of another key in the trie.
 
         See :func:`Trie.has_node` for more detailed documentation.
         """
-        return bool(self.has_node(key) & self.HAS_SUBTRIE)
+        try:
+            return self._find_node(key).children is not _EMPTY
+        except KeyError:
+            return False
+
+    def prefix_walker(self):
+        """Returns a generator walking down the trie one step at a time.
+
+        The generator must first be started with ``next()`` which yields state
+        of the root node.  Afterwards, each step sent to it moves the walk one
+        node down and yields state of the reached node.  The state is
+        a ``(has_node, value)`` pair where ``has_node`` is a bit-field like the
+        one :func:`Trie.has_node` returns and ``value`` is the value associated
+        with the node or ``None`` if there is none.
+
+        This allows checking a key as it grows one step at a time (for example
+        as the user types it) without walking the trie from the root for each
+        new step::
+
+            >>> import pygtrie
+            >>> t = pygtrie.CharTrie(cat=1, caterpillar=2)
+            >>> walker = t.prefix_walker()
+            >>> next(walker)
+            (2, None)
+            >>> [walker.send(ch) for ch in 'cat']
+            [(2, None), (2, None), (3, 1)]
+            >>> walker.send('s')
+            (0, None)
+            >>> walker.send('e')
+            (0, None)
+
+        Once a step leads to a node which does not exist, all further steps
+        yield ``(0, None)``.  To start again from the root, create a new
+        walker.  If the trie is modified while a walker is in use, the walker
+        may not see the changes.
+
+        Yields:
+            ``(has_node, value)`` state of each node reached.
+        """
+        node = self._root
+        while True:
+            if node is None:
+                state = 0, None
+            elif node.value is _SENTINEL:
+                state = self.HAS_SUBTRIE * (node.children is not _EMPTY), None
+            else:
+                state = (self.HAS_VALUE | self.HAS_SUBTRIE *
+                         (node.children is not _EMPTY)), node.value
+            step = yield state
+            if node is not None:
+                node = node.children.get(step)
 
     @staticmethod
     def _slice_maybe(key_or_slice):
@@ -681,11 +1117,36 @@ class Trie(_collections.MutableMapping):
         """
         if self._slice_maybe(key_or_slice)[1]:
             return self.itervalues(key_or_slice.start)
-        node, _ = self._get_node(key_or_slice)
+        node = self._find_node(key_or_slice)
         if node.value is _SENTINEL:
             raise ShortKeyError(key_or_slice)
         return node.value
 
+    def __contains__(self, key):
+        try:
+            return self._find_node(key).value is not _SENTINEL
+        except KeyError:
+            return False
+
+    def get(self, key, default=None):
+        """Returns value associated with given key or ``default``.
+
+        Unlike :func:`Trie.__getitem__`, slices are not supported.
+
+        Args:
+            key: A key to look for.
+            default: Value to return if the key has no value associated with
+                it.
+
+        Returns:
+            Value associated with the key or ``default``.
+        """
+        try:
+            value = self._find_node(key).value
+        except KeyError:
+            return default
+        return default if value is _SENTINEL else value
+
     def _set(self, key, value, only_if_missing=False, clear_children=False):
         """Sets value for a given key.
 
@@ -700,13 +1161,29 @@ class Trie(_collections.MutableMapping):
         Returns:
             Value of the node.
         """
-        node, _ = self._get_node(key, create=True)
-        if not only_if_missing or node.value is _SENTINEL:
+        node = self._find_node(key, create=True)
+        if node.value is _SENTINEL:
+            self._size += 1
+            node.value = value
+        elif not only_if_missing:
             node.value = value
         if clear_children:
-            node.children.clear()
+            self._clear_children(node)
         return node.value
 
+    def _clear_children(self, node):
+        """Removes all descendants of given node and their values.
+
+        Args:
+            node: Node whose children to remove.  Its own value is kept.
+        """
+        if node.children is not _EMPTY:
+            removed = sum(1 for _ in node.iterate_values(False, _iteritems))
+            if node.value is not _SENTINEL:
+                removed -= 1
+            self._size -= removed
+            node.children = _EMPTY
+
     def __setitem__(self, key_or_slice, value):
         """Sets value associated with given key.
 
@@ -757,7 +1234,7 @@ class Trie(_collections.MutableMapping):
         while i and not node:
             i -= 1
             parent_step, parent = trace[i]
-            del parent.children[step]
+            parent.children.delete(parent, step)
             step, node = parent_step, parent
 
     def _pop_from_node(self, node, trace, default=_SENTINEL):
@@ -778,6 +1255,7 @@ class Trie(_collections.MutableMapping):
         if node.value is not _SENTINEL:
             value = node.value
             node.value = _SENTINEL
+            self._size -= 1
             self._cleanup_trace(trace)
             return value
         elif default is _SENTINEL:
@@ -830,7 +1308,7 @@ class Trie(_collections.MutableMapping):
         node = self._root
         trace = [(None, node)]
         while node.value is _SENTINEL:
-            step = next(_iterkeys(node.children))
+            step = next(iter(node.children))
             node = node.children[step]
             trace.append((step, node))
         return (self._key_from_path((step for step, _ in trace[1:])),
@@ -873,10 +1351,12 @@ class Trie(_collections.MutableMapping):
         key, is_slice = self._slice_maybe(key_or_slice)
         node, trace = self._get_node(key)
         if is_slice:
-            node.children.clear()
+            self._clear_children(node)
         elif node.value is _SENTINEL:
             raise ShortKeyError(key)
-        node.value = _SENTINEL
+        if node.value is not _SENTINEL:
+            self._size -= 1
+            node.value = _SENTINEL
         self._cleanup_trace(trace)
 
     def prefixes(self, key):
@@ -901,15 +1381,18 @@ class Trie(_collections.MutableMapping):
             encountered on the way towards the specified key.
         """
         node = self._root
-        path = self.__path_from_key(key)
-        pos = 0
+        path = self._path_from_key(key)
+        key_from_path = self._key_from_path
+        sentinel = _SENTINEL
+        pos, end = 0, len(path)
         while True:
-            if node.value is not _SENTINEL:
-                yield self._key_from_path(path[:pos]), node.value
-            if pos == len(path):
+            value = node.value
+            if value is not sentinel:
+                yield key_from_path(path[:pos]), value
+            if pos == end:
                 break
             node = node.children.get(path[pos])
-            if not node:
+            if node is None:
                 break
             pos += 1
 
@@ -943,7 +1426,20 @@ class Trie(_collections.MutableMapping):
             equal ``key``) and ``value`` is a value associated with that key.
             If no node is found, ``(None, None)`` is returned.
         """
-        return next(self.prefixes(key), _NONE_PAIR)
+        # Equivalent to next(self.prefixes(key), _NONE_PAIR) without creating
+        # a generator.
+        node = self._root
+        path = self._path_from_key(key)
+        sentinel = _SENTINEL
+        pos, end = 0, len(path)
+        while node.value is sentinel:
+            if pos == end:
+                return _NONE_PAIR
+            node = node.children.get(path[pos])
+            if node is None:
+                return _NONE_PAIR
+            pos += 1
+        return self._key_from_path(path[:pos]), node.value
 
     def longest_prefix(self, key):
         """Finds the longest prefix of a key with a value.
@@ -975,16 +1471,62 @@ class Trie(_collections.MutableMapping):
             equal ``key``) and ``value`` is a value associated with that key.
             If no node is found, ``(None, None)`` is returned.
         """
-        ret = _NONE_PAIR
-        for ret in self.prefixes(key):
-            pass
-        return ret
+        # Equivalent to taking the last item from self.prefixes(key) but the
+        # key is constructed only once, for the match that is returned.
+        node = self._root
+        path = self._path_from_key(key)
+        sentinel = _SENTINEL
+        pos, end = 0, len(path)
+        match_pos, match = 0, None
+        while True:
+            if node.value is not sentinel:
+                match_pos, match = pos, node
+            if pos == end:
+                break
+            node = node.children.get(path[pos])
+            if node is None:
+                break
+            pos += 1
+        if match is None:
+            return _NONE_PAIR
+        return self._key_from_path(path[:match_pos]), match.value
+
+    def _has_prefix(self, key):
+        """Checks whether a key or any of its prefixes has a value.
+
+        Equivalent to ``bool(self.shortest_prefix(key))`` except the matched
+        prefix is never converted back into a key.
+
+        Args:
+            key: Key to look for.
+
+        Returns:
+            ``True`` if a value is associated with ``key`` or one of its
+            prefixes, ``False`` otherwise.
+        """
+        node = self._root
+        sentinel = _SENTINEL
+        for step in self._path_from_key(key):
+            if node.value is not sentinel:
+                return True
+            node = node.children.get(step)
+            if node is None:
+                return False
+        return node.value is not sentinel
 
     def __eq__(self, other):
-        return self._root == other._root  # pylint: disable=protected-access
+        # pylint: disable=protected-access
+        if self is other:
+            return True
+        if not isinstance(other, Trie):
+            return NotImplemented
+        if self._size != other._size:
+            return False
+        return self._root == other._root
 
     def __ne__(self, other):
-        return self._root != other._root  # pylint: disable=protected-access
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
 
     def __str__(self):
         return 'Trie(%s)' % (
@@ -997,21 +1539,6 @@ class Trie(_collections.MutableMapping):
         else:
             return 'Trie()'
 
-    def __path_from_key(self, key):
-        """Converts a user visible key object to internal path representation.
-
-        Args:
-            key: User supplied key or ``_SENTINEL``.
-
-        Returns:
-            An empty tuple if ``key`` was ``_SENTINEL``, otherwise whatever
-            :func:`Trie._path_from_key` returns.
-
-        Raises:
-            TypeError: If ``key`` is of invalid type.
-        """
-        return () if key is _SENTINEL else self._path_from_key(key)
-
     def _path_from_key(self, key):  # pylint: disable=no-self-use
         """Converts a user visible key object to internal path representation.
 
@@ -1150,10 +1677,9 @@ class Trie(_collections.MutableMapping):
             node.
 
         """
-        node, _ = self._get_node(prefix)
-        return node.traverse(node_factory, self._key_from_path,
-                             list(self.__path_from_key(prefix)),
-                             self._iteritems)
+        node, path = self._find_prefix(prefix)
+        return node.traverse(node_factory, self._key_from_path, tuple(path),
+                             _sorted_iteritems if self._sorted else _iteritems)
 
 class CharTrie(Trie):
     """A variant of a :class:`pygtrie.Trie` which accepts strings as keys.
@@ -1180,10 +1706,22 @@ class CharTrie(Trie):
         True
         >>> t.has_subtrie('manhole')
         False
+
+    Note that each step of a walk through the trie is a separate dictionary
+    look-up done by the interpreter.  With only a handful of keys whose prefixes
+    need to be matched, probing a plain :class:`dict` with successively shorter
+    prefixes of the string may be faster.  Similarly, a small set of words which
+    does not change can be kept in a sorted list.  There, the first word not
+    less than a string, found with :func:`bisect.bisect_left`, tells whether the
+    string is a word or a prefix of one.  The trie pays off as the number of
+    keys grows, when keys are added and removed or when whole subtries need to
+    be iterated over or deleted.
     """
+    __slots__ = ()
 
-    def _key_from_path(self, path):
-        return ''.join(path)
+    # Calling the C-level join directly saves a Python frame for every key
+    # produced.  A bound method of a constant needs no instance state.
+    _key_from_path = staticmethod(''.join)
 
 
 class StringTrie(Trie):
@@ -1210,12 +1748,14 @@ class StringTrie(Trie):
 
         handler = handlers.longest_prefix(request_path)
     """
+    __slots__ = ('_separator', '_intern')
 
     def __init__(self, *args, **kwargs):
         """Initialises the trie.
 
-        Except for a ``separator`` named argument, all other arguments are
-        interpreted the same way :func:`Trie.update` interprets them.
+        Except for ``separator`` and ``intern`` named arguments, all other
+        arguments are interpreted the same way :func:`Trie.update` interprets
+        them.
 
         Args:
             *args: Passed to super class initialiser.
@@ -1224,6 +1764,13 @@ class StringTrie(Trie):
                 the trie.  "/" is used if this argument is not specified.  This
                 named argument is not specified on the function's prototype
                 because of Python's limitations.
+            intern: Whether to intern (see :func:`sys.intern`) components of
+                the keys.  When the same components repeat in many keys (as
+                directory names do in file paths), this makes all the nodes
+                share a single string object per distinct component rather
+                than each holding its own copy.  Costs an extra look-up per
+                component on each operation.  ``False`` by default.  Like
+                ``separator``, not specified on the function's prototype.
         """
         separator = kwargs.pop('separator', '/')
         if not isinstance(separator, _basestring):
@@ -1231,17 +1778,31 @@ class StringTrie(Trie):
         if not separator:
             raise ValueError('separator can not be empty')
         self._separator = separator
+        self._intern = bool(kwargs.pop('intern', False))
         super(StringTrie, self).__init__(*args, **kwargs)
 
+    def copy(self):
+        """Returns a shallow copy of the trie with the same settings."""
+        return self.__class__(self, separator=self._separator,
+                              intern=self._intern)
+
+    def __setstate__(self, state):
+        # Default for tries pickled by versions which did not support interning.
+        self._intern = False
+        super(StringTrie, self).__setstate__(state)
+
     @classmethod
     def fromkeys(cls, keys, value=None, separator='/'):  # pylint: disable=arguments-differ
         trie = cls(separator=separator)
-        for key in keys:
-            trie[key] = value
+        trie._merge_items(  # pylint: disable=protected-access
+            (key, value) for key in keys)
         return trie
 
     def _path_from_key(self, key):
-        return key.split(self._separator)
+        path = key.split(self._separator)
+        if self._intern:
+            path = [_intern(step) for step in path]
+        return path
 
     def _key_from_path(self, path):
         return self._separator.join(path)
@@ -1260,32 +1821,90 @@ class PrefixSet(_collections.MutableSet):  # pylint: disable=abstract-class-not-
     behaviour for element deletion.
     """
 
-    def __init__(self, iterable=None, factory=Trie, **kwargs):
+    # Defaults for sets unpickled from versions which had no membership cache.
+    _cache_size = 0
+    _cache = None
+
+    def __init__(self, iterable=None, factory=Trie, cache_size=0, **kwargs):
         """Initialises the prefix set.
 
         Args:
             iterable: A sequence of keys to add to the set.
             factory: A function used to create a trie used by the
                     :class:`pygtrie.PrefixSet`.
+            cache_size: Maximum number of results of membership tests to
+                    remember.  When the same keys are tested over and over (as
+                    with request paths or addresses), a cache saves walking the
+                    trie for each of them.  The cache is emptied whenever a key
+                    is added.  If full, the least recently used entry is
+                    evicted.  Keys which are not hashable are never cached.
+                    Zero, the default, disables the cache.
             kwargs: Additional keyword arguments passed to the factory function.
+
+        Raises:
+            ValueError: If ``cache_size`` is negative.
         """
         super(PrefixSet, self).__init__()
         trie = factory(**kwargs)
         if iterable:
             trie.update((key, True) for key in iterable)
         self._trie = trie
+        if cache_size < 0:
+            raise ValueError('cache_size must not be negative')
+        self._cache_size = cache_size
+        self._cache = _OrderedDict()
 
     def copy(self):
         """Returns a copy of the prefix set."""
-        return self.__class__(self._trie)
+        return self.__class__(self._trie, cache_size=self._cache_size)
 
     def clear(self):
         """Removes all keys from the set."""
         self._trie.clear()
+        if self._cache_size:
+            self._cache.clear()
 
     def __contains__(self, key):
         """Checks whether set contains key or its prefix."""
-        return bool(self._trie.shortest_prefix(key)[1])
+        # pylint: disable=protected-access
+        if not self._cache_size:
+            return self._trie._has_prefix(key)
+        cache = self._cache
+        try:
+            result = cache.pop(key)
+        except KeyError:
+            result = self._trie._has_prefix(key)
+            if len(cache) >= self._cache_size:
+                # Entries are kept from least to most recently used.
+                del cache[next(iter(cache))]
+        except TypeError:
+            return self._trie._has_prefix(key)
+        cache[key] = result
+        return result
+
+    def covering_prefix(self, key):
+        """Returns key stored in the set which is a prefix of given key.
+
+        Membership check and look-up of the prefix which makes the key an
+        element of the set are done in a single walk of the trie.  For
+        example::
+
+            >>> import pygtrie
+            >>> ps = pygtrie.PrefixSet(factory=pygtrie.StringTrie)
+            >>> ps.add('foo/bar')
+            >>> ps.covering_prefix('foo/bar/baz')
+            'foo/bar'
+            >>> ps.covering_prefix('foo') is None
+            True
+
+        Args:
+            key: Key to look for.
+
+        Returns:
+            A key stored in the set which is a prefix of (or is equal to)
+            ``key`` or ``None`` if ``key`` is not in the set.
+        """
+        return self._trie.shortest_prefix(key)[0]
 
     def __iter__(self):
         """Return iterator over all prefixes in the set.
@@ -1362,6 +1981,8 @@ class PrefixSet(_collections.MutableSet):  # pylint: disable=abstract-class-not-
         """
         if key not in self:
             self._trie[key:] = True
+            if self._cache_size:
+                self._cache.clear()
 
     def discard(self, key):
         raise NotImplementedError(
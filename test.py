@@ -8,8 +8,11 @@ __copyright__ = 'Copyright 2014 Google Inc.'
 
 import array
 import collections
+import contextlib
 import pickle
+import sys
 import unittest
+import weakref
 
 import pygtrie
 
@@ -97,7 +100,15 @@ class TrieTestCase(unittest.TestCase):
 
     # pylint: disable=invalid-name
 
-    def assertNodeState(self, t, key, prefix=False, value=None):
+    def _keys_snapshot(self, t):
+        """Returns set of keys in a trie checking keys() agrees with it."""
+        keys = set(t.iterkeys())
+        self.assertEqual(keys, set(t.keys()))
+        return keys
+
+    # keys is an optional cache on top of the checked state, hence the disable.
+    def assertNodeState(  # pylint: disable=too-many-arguments
+            self, t, key, prefix=False, value=None, keys=None):
         """Asserts a state of given node in a trie.
 
         Args:
@@ -107,67 +118,72 @@ class TrieTestCase(unittest.TestCase):
               trie.
             value: If given, value associated with the key.  If missing, node
                 has no value associated with it.
+            keys: If given, set of keys in the trie as returned by
+                _keys_snapshot.  Lets callers checking many nodes of the same
+                trie iterate over it only once.
         Raises:
             AssertionError: If any assumption is not met.
         """
-        if prefix:
-            self.assertTrue(t.has_subtrie(key))
-            self.assertTrue(bool(t.has_node(key) & pygtrie.Trie.HAS_SUBTRIE))
-        else:
-            self.assertFalse(t.has_subtrie(key))
-            self.assertFalse(bool(t.has_node(key) & pygtrie.Trie.HAS_SUBTRIE))
+        if keys is None:
+            keys = self._keys_snapshot(t)
+        self.assertEqual(
+            (pygtrie.Trie.HAS_SUBTRIE if prefix else 0) |
+            (pygtrie.Trie.HAS_VALUE if value is not None else 0),
+            t.has_node(key))
+        self.assertEqual(prefix, t.has_subtrie(key))
         if value is None:
             o = object()
             self.assertNotIn(key, t)
             key_error_exception = pygtrie.ShortKeyError if prefix else KeyError
-            self.assertRaises(key_error_exception, lambda: t[key])
+            with self.assertRaises(key_error_exception):
+                t[key]  # pylint: disable=pointless-statement
             self.assertRaises(key_error_exception, t.pop, key)
             self.assertIsNone(t.get(key))
             self.assertIs(o, t.get(key, o))
             self.assertIs(o, t.pop(key, o))
             self.assertFalse(t.has_key(key))
-            self.assertNotIn(self.key_from_key(key), list(t.iterkeys()))
-            self.assertNotIn(self.key_from_key(key), t.keys())
-            self.assertEqual(pygtrie.Trie.HAS_SUBTRIE if prefix else 0,
-                                                t.has_node(key))
+            self.assertNotIn(self.key_from_key(key), keys)
         else:
             self.assertIn(key, t)
             self.assertEqual(value, t[key])
             self.assertEqual(value, t.get(key))
             self.assertEqual(value, t.get(key, object()))
             self.assertTrue(t.has_key(key))
-            self.assertTrue(bool(t.has_node(key) & pygtrie.Trie.HAS_VALUE))
-            self.assertIn(self.key_from_key(key), list(t.iterkeys()))
-            self.assertIn(self.key_from_key(key), t.keys())
+            self.assertIn(self.key_from_key(key), keys)
 
     def assertFullTrie(self, t, value=42):
         """Asserts a trie has _SHORT_KEY and _LONG_KEY set to value."""
         self.assertEqual(2, len(t))
+        keys = self._keys_snapshot(t)
         for prefix in self._SHORT_PREFIXES + self._LONG_PREFIXES:
-            self.assertNodeState(t, prefix, prefix=True)
-        self.assertNodeState(t, self._SHORT_KEY, prefix=True, value=value)
-        self.assertNodeState(t, self._LONG_KEY, value=value)
-        self.assertNodeState(t, self._VERY_LONG_KEY)
-        self.assertNodeState(t, self._OTHER_KEY)
+            self.assertNodeState(t, prefix, prefix=True, keys=keys)
+        self.assertNodeState(t, self._SHORT_KEY, prefix=True, value=value,
+                             keys=keys)
+        self.assertNodeState(t, self._LONG_KEY, value=value, keys=keys)
+        self.assertNodeState(t, self._VERY_LONG_KEY, keys=keys)
+        self.assertNodeState(t, self._OTHER_KEY, keys=keys)
 
     def assertShortTrie(self, t, value=42):
         """Asserts a trie has only _SHORT_KEY set to value."""
         self.assertEqual(1, len(t))
+        keys = self._keys_snapshot(t)
         for prefix in self._SHORT_PREFIXES:
-            self.assertNodeState(t, prefix, prefix=True)
+            self.assertNodeState(t, prefix, prefix=True, keys=keys)
         for key in self._LONG_PREFIXES + (
                 self._LONG_KEY, self._VERY_LONG_KEY, self._OTHER_KEY):
-            self.assertNodeState(t, key)
-        self.assertNodeState(t, self._SHORT_KEY, value=value)
+            self.assertNodeState(t, key, keys=keys)
+        self.assertNodeState(t, self._SHORT_KEY, value=value, keys=keys)
 
     def assertEmptyTrie(self, t):
         """Asserts a trie is empty."""
         self.assertEqual(0, len(t), '%r should be empty: %d' % (t, len(t)))
+        keys = self._keys_snapshot(t)
+        self.assertEqual(set(), keys)
 
         for key in self._SHORT_PREFIXES + self._LONG_PREFIXES + (
                 self._SHORT_KEY, self._LONG_KEY, self._VERY_LONG_KEY,
                 self._OTHER_KEY):
-            self.assertNodeState(t, key)
+            self.assertNodeState(t, key, keys=keys)
 
         self.assertRaises(KeyError, t.popitem)
 
@@ -212,13 +228,15 @@ class TrieTestCase(unittest.TestCase):
         short_key = self.key_from_key(self._SHORT_KEY)
         long_key = self.key_from_key(self._LONG_KEY)
 
+        # Nodes are visited before their children and _SHORT_KEY is a prefix of
+        # _LONG_KEY, so the order of the keys is fixed without sorting.
         expected_items = [(short_key, 42), (long_key, 42)]
-        self.assertEqual(expected_items, sorted(t.items()))
-        self.assertEqual(expected_items, sorted(t.iteritems()))
+        self.assertEqual(expected_items, t.items())
+        self.assertEqual(expected_items, list(t.iteritems()))
 
-        self.assertEqual([short_key, long_key], sorted(t))
-        self.assertEqual([short_key, long_key], sorted(t.keys()))
-        self.assertEqual([short_key, long_key], sorted(t.iterkeys()))
+        self.assertEqual([short_key, long_key], list(t))
+        self.assertEqual([short_key, long_key], t.keys())
+        self.assertEqual([short_key, long_key], list(t.iterkeys()))
 
     def _do_test_subtrie_iterator(self, trie_factory):
         """Subtrie iterator tests."""
@@ -234,11 +252,11 @@ class TrieTestCase(unittest.TestCase):
         self.assertEqual([42], list(t.itervalues(prefix=prefix)))
 
         expected_items = [(long_key, 42)]
-        self.assertEqual(expected_items, sorted(t.items(prefix=prefix)))
-        self.assertEqual(expected_items, sorted(t.iteritems(prefix=prefix)))
+        self.assertEqual(expected_items, t.items(prefix=prefix))
+        self.assertEqual(expected_items, list(t.iteritems(prefix=prefix)))
 
-        self.assertEqual([long_key], sorted(t.keys(prefix=prefix)))
-        self.assertEqual([long_key], sorted(t.iterkeys(prefix=prefix)))
+        self.assertEqual([long_key], t.keys(prefix=prefix))
+        self.assertEqual([long_key], list(t.iterkeys(prefix=prefix)))
 
     def _do_test_shallow_iterator(self, trie_factory):
         """Shallow iterator test."""
@@ -251,11 +269,11 @@ class TrieTestCase(unittest.TestCase):
         short_key = self.key_from_key(self._SHORT_KEY)
 
         expected_items = [(short_key, 42)]
-        self.assertEqual(expected_items, sorted(t.items(shallow=True)))
-        self.assertEqual(expected_items, sorted(t.iteritems(shallow=True)))
+        self.assertEqual(expected_items, t.items(shallow=True))
+        self.assertEqual(expected_items, list(t.iteritems(shallow=True)))
 
-        self.assertEqual([short_key], sorted(t.keys(shallow=True)))
-        self.assertEqual([short_key], sorted(t.iterkeys(shallow=True)))
+        self.assertEqual([short_key], t.keys(shallow=True))
+        self.assertEqual([short_key], list(t.iterkeys(shallow=True)))
 
     def _do_test_splice_operations(self, trie_factory):
         """Splice trie operations tests."""
@@ -269,7 +287,8 @@ class TrieTestCase(unittest.TestCase):
         self.assertShortTrie(t, 24)
 
         self.assertEqual([24], list(t[self._SHORT_KEY:]))
-        self.assertRaises(KeyError, lambda: list(t[self._LONG_PREFIXES[0]:]))
+        with self.assertRaises(KeyError):
+            list(t[self._LONG_PREFIXES[0]:])
 
         t[self._LONG_KEY:] = 24
         self.assertFullTrie(t, 24)
@@ -316,6 +335,19 @@ class TrieTestCase(unittest.TestCase):
         self.assertEqual([short_pair, long_pair],
                           list(t.prefixes(self._VERY_LONG_KEY)))
 
+    def test_prefix_walker(self):
+        """Prefix walker test."""
+        t = self._TRIE_CLS(dict.fromkeys((self._SHORT_KEY, self._LONG_KEY), 42))
+
+        walker = t.prefix_walker()
+        self.assertEqual((pygtrie.Trie.HAS_SUBTRIE, None), next(walker))
+        path = self.path_from_key(self._VERY_LONG_KEY)
+        for pos in range(1, len(path) + 1):
+            node = t.has_node(self.key_from_path(path[:pos]))
+            value = 42 if node & pygtrie.Trie.HAS_VALUE else None
+            self.assertEqual((node, value), walker.send(path[pos - 1]))
+        self.assertEqual((0, None), walker.send(path[0]))
+
     def _do_test_pickle(self, trie_factory):
         """https://github.com/google/pygtrie/issues/7"""
         d = dict.fromkeys((self._SHORT_KEY, self._LONG_KEY, self._VERY_LONG_KEY,
@@ -355,6 +387,16 @@ class TrieTestCase(unittest.TestCase):
         self.assertEqual([long_key], list(ps.iter(self._LONG_KEY)))
         self.assertEqual([], list(ps.iter(self._OTHER_KEY)))
 
+        self.assertEqual(short_key, ps.covering_prefix(self._SHORT_KEY))
+        self.assertEqual(short_key, ps.covering_prefix(self._VERY_LONG_KEY))
+        self.assertIsNone(ps.covering_prefix(self._SHORT_PREFIXES[-1]))
+        self.assertIsNone(ps.covering_prefix(self._OTHER_KEY))
+
+        self.assertIn(self._SHORT_KEY, ps)
+        self.assertIn(self._VERY_LONG_KEY, ps)
+        self.assertNotIn(self._SHORT_PREFIXES[-1], ps)
+        self.assertNotIn(self._OTHER_KEY, ps)
+
         ps.add(self._OTHER_KEY)
         self.assertEqual(2, len(ps))
         self.assertEqual(sorted((short_key, other_key)),
@@ -363,41 +405,190 @@ class TrieTestCase(unittest.TestCase):
         self.assertEqual([long_key], list(ps.iter(self._LONG_KEY)))
         self.assertEqual([other_key], list(ps.iter(self._OTHER_KEY)))
 
+    def test_prefix_set_cache(self):
+        """PrefixSet with membership cache test."""
+        # pylint: disable=protected-access
+        ps = pygtrie.PrefixSet(factory=self._TRIE_CLS, cache_size=2)
+        ps.add(self._LONG_KEY)
+        for _ in range(2):
+            self.assertIn(self._VERY_LONG_KEY, ps)
+            self.assertNotIn(self._SHORT_KEY, ps)
+            self.assertNotIn(self._OTHER_KEY, ps)
+
+        # Least recently used results are evicted first and a hit counts as
+        # a use.  Changing the trie behind the set's back shows which results
+        # still come from the cache.
+        ps = pygtrie.PrefixSet(factory=self._TRIE_CLS, cache_size=2)
+        ps.add(self._LONG_KEY)
+        self.assertIn(self._VERY_LONG_KEY, ps)
+        self.assertNotIn(self._OTHER_KEY, ps)
+        self.assertIn(self._VERY_LONG_KEY, ps)
+        self.assertNotIn(self._SHORT_KEY, ps)  # Evicts _OTHER_KEY.
+        del ps._trie[self._LONG_KEY]
+        ps._trie[self._OTHER_KEY] = True
+        self.assertIn(self._VERY_LONG_KEY, ps)
+        self.assertIn(self._OTHER_KEY, ps)
+        ps._trie[self._LONG_KEY] = True
+        del ps._trie[self._OTHER_KEY]
+
+        ps.add(self._SHORT_KEY)
+        self.assertIn(self._SHORT_KEY, ps)
+        ps.add(self._OTHER_KEY)
+        self.assertIn(self._OTHER_KEY, ps)
+
+        self.assertEqual(2, ps.copy()._cache_size)
+        ps.clear()
+        self.assertNotIn(self._SHORT_KEY, ps)
+        self.assertNotIn(self._VERY_LONG_KEY, ps)
+
+        self.assertRaises(ValueError, pygtrie.PrefixSet, cache_size=-1)
+
+    def test_update_shared_prefixes(self):
+        """Tests bulk update with keys sharing and diverging from prefixes."""
+        keys = (self._LONG_KEY, self._SHORT_KEY, self._VERY_LONG_KEY,
+                self._OTHER_KEY, self._LONG_PREFIXES[-1], self._LONG_KEY)
+        t = self._TRIE_CLS()
+        t.update((key, i) for i, key in enumerate(keys))
+
+        expected = dict((self.key_from_key(key), i)
+                        for i, key in enumerate(keys))
+        self.assertEqual(expected, dict(t.iteritems()))
+        self.assertEqual(t, self._TRIE_CLS(expected.items()))
+
+    def test_add_and_remove_children(self):
+        """Tests nodes gaining and losing children one at a time."""
+        keys = (self._LONG_KEY, self._OTHER_KEY, self._VERY_LONG_KEY,
+                self._SHORT_KEY)
+        t = self._TRIE_CLS()
+        for i, key in enumerate(keys):
+            t[key] = i
+            self.assertEqual(i + 1, len(t))
+            self.assertEqual(t, pickle.loads(pickle.dumps(t)))
+        for key in reversed(keys[1:]):
+            del t[key]
+            self.assertNodeState(t, key, prefix=key == self._SHORT_KEY)
+            self.assertEqual(t, pickle.loads(pickle.dumps(t)))
+        self.assertEqual(t, self._TRIE_CLS({self._LONG_KEY: 0}))
+        for prefix in self._SHORT_PREFIXES + self._LONG_PREFIXES:
+            self.assertNodeState(t, prefix, prefix=True)
+        self.assertNodeState(t, self._LONG_KEY, value=0)
+        del t[self._LONG_KEY]
+        self.assertEmptyTrie(t)
+
+    def test_update_dict_subclass(self):
+        other_key = self._OTHER_KEY
+
+        class Dict(dict):
+            def items(self):
+                return [(other_key, value) for value in self.values()]
+            iteritems = items
+
+        # Like other mappings, subclasses of dict are read through keys() and
+        # __getitem__ rather than items().
+        t = self._TRIE_CLS()
+        t.update(Dict({self._SHORT_KEY: 1}))
+        self.assertEqual([(self.key_from_key(self._SHORT_KEY), 1)], t.items())
+
+    def test_weakref(self):
+        t = self._TRIE_CLS({self._SHORT_KEY: 42})
+        ref = weakref.ref(t)
+        self.assertIs(t, ref())
+        self.assertEqual(t, pickle.loads(pickle.dumps(t)))
+
+    def test_len(self):
+        """Tests that length follows values being set and removed."""
+        t = self._TRIE_CLS()
+        self.assertEqual(0, len(t))
+        t.update({self._SHORT_KEY: 1, self._LONG_KEY: 2})
+        self.assertEqual(2, len(t))
+        t[self._SHORT_KEY] = 3
+        t.setdefault(self._LONG_KEY, 4)
+        self.assertEqual(2, len(t))
+        t.setdefault(self._OTHER_KEY, 5)
+        self.assertEqual(3, len(t))
+        t[self._SHORT_KEY:] = 6
+        self.assertEqual(2, len(t))
+        t[self._VERY_LONG_KEY] = 7
+        self.assertEqual(3, len(t))
+
+        # Tries pickled before the length was tracked have no _size.
+        state = t.__getstate__()
+        del state['_size']
+        u = self._TRIE_CLS.__new__(self._TRIE_CLS)
+        u.__setstate__(state)
+        self.assertEqual(3, len(u))
+
+        del t[self._SHORT_KEY:]
+        self.assertEqual(1, len(t))
+        t.pop(self._OTHER_KEY)
+        self.assertEqual(0, len(t))
+        self.assertFalse(t)
+        t[self._OTHER_KEY] = 8
+        t.clear()
+        self.assertEqual(0, len(t))
+
     def test_equality(self):
         """Tests equality comparison."""
         d = dict.fromkeys((self._SHORT_KEY, self._LONG_KEY), 42)
         # pylint: disable=redefined-outer-name
         tries = [factory(self._TRIE_CLS, d) for _, factory in _TRIE_FACTORIES]
 
+        # Equality is transitive so comparing against one trie is enough.
+        baseline = tries[0]
         for i in range(1, len(tries)):
-            self.assertEqual(tries[i-1], tries[i],
+            self.assertEqual(baseline, tries[i],
                               '%r (factory: %s) should equal %r (factory: %s)' %
-                              (tries[i-1], _TRIE_FACTORIES[i-1][0],
+                              (baseline, _TRIE_FACTORIES[0][0],
                                tries[i], _TRIE_FACTORIES[i][0]))
 
         for i in range(1, len(tries)):
-            tries[i-1][self._OTHER_KEY] = 42
-            self.assertNotEqual(
-                    tries[i-1], tries[i],
-                    '%r (factory: %s) should not be equal %r (factory: %s)' %
-                    (tries[i-1], _TRIE_FACTORIES[i-1][0],
-                     tries[i], _TRIE_FACTORIES[i][0]))
+            # Tries of different sizes and, to exercise the walk over nodes,
+            # tries of the same size with different values.
+            for key, value in ((self._OTHER_KEY, 42), (self._SHORT_KEY, 24)):
+                mutated = tries[i].copy()
+                mutated[key] = value
+                self.assertNotEqual(
+                        baseline, mutated,
+                        '%r should not be equal %r (factory: %s)' %
+                        (baseline, mutated, _TRIE_FACTORIES[i][0]))
+
+        self.assertNotEqual(tries[0], d)
+        self.assertFalse(tries[0] == 42)
+
+
+@contextlib.contextmanager
+def _factory_context(factory_name):
+    """Adds factory name to failures on Pythons without TestCase.subTest."""
+    try:
+        yield
+    except AssertionError as e:
+        raise AssertionError('%s (factory: %s)' % (e, factory_name))
 
 
 def _construct_trie_test_cases():
 
-    def make_test_method(method, factory):
-        return lambda self: method(self, trie_factory=factory)
+    def make_test_method(name):
+        # Look the method up on the instance so that subclasses which override
+        # a _do_test_* method have the override run for every factory.
+        def test(self):
+            sub_test = getattr(self, 'subTest', None)
+            for factory_name, factory in _TRIE_FACTORIES:
+                if sub_test:
+                    ctx = sub_test(factory=factory_name)
+                else:
+                    ctx = _factory_context(factory_name)
+                with ctx:
+                    getattr(self, name)(trie_factory=factory)
+        return test
 
     for name in list(TrieTestCase.__dict__.keys()):
         if not name.startswith('_do_test_'):
             continue
-        orig = getattr(TrieTestCase, name)
-        for factory_name, factory in _TRIE_FACTORIES:
-            method = make_test_method(orig, factory)
-            method.__doc__ = '%s using %s trie factory.' % (
-                orig.__doc__[:-2], factory_name)
-            setattr(TrieTestCase, '%s_%s' % (name[4:], factory_name), method)
+        method = make_test_method(name)
+        doc = getattr(TrieTestCase, name).__doc__
+        method.__doc__ = '%s with each trie factory.' % (
+            doc[:-1] if doc.endswith('.') else doc)
+        setattr(TrieTestCase, name[4:], method)
 
 _construct_trie_test_cases()
 
@@ -437,11 +628,103 @@ class StringTrieTestCase(TrieTestCase):
         t['foo.bar'] = 42
         self.assertTrue(bool(t.has_node('foo') & pygtrie.Trie.HAS_SUBTRIE))
 
+    def test_intern(self):
+        t = pygtrie.StringTrie(intern=True)
+        t.update({'foo/bar': 1, 'baz/bar': 2})
+        t[u'qux/bar'] = 3
+        self.assertEqual(1, t['foo/bar'])
+        self.assertEqual(2, t['baz/bar'])
+        self.assertEqual(3, t[u'qux/bar'])
+        self.assertTrue(t.has_subtrie('foo'))
+        self.assertEqual(t, pygtrie.StringTrie(t.items()))
+
+        # Steps equal to each other are stored as a single interned object.
+        # pylint: disable=protected-access
+        # pylint: disable=undefined-variable
+        intern_ = getattr(sys, 'intern', None) or intern
+        def bar_step(trie, first):
+            children = trie._root.children[first].children
+            return list(children.keys())[0]
+        self.assertIs(intern_('bar'), bar_step(t, 'foo'))
+        self.assertIs(intern_('bar'), bar_step(t, 'baz'))
+
+        u = pickle.loads(pickle.dumps(t))
+        self.assertEqual(t, u)
+        u['foo/qux'] = 4
+        self.assertEqual(4, u['foo/qux'])
+
+        t = pygtrie.StringTrie(separator='.', intern=True)
+        t['foo.bar'] = 1
+        u = t.copy()
+        self.assertTrue(u._intern)
+        self.assertEqual(t, u)
+        u['baz.bar'] = 2
+        self.assertEqual(['baz.bar', 'foo.bar'], sorted(u.keys()))
+        self.assertIs(intern_('bar'), bar_step(u, 'baz'))
+
+    def test_fromkeys(self):
+        t = pygtrie.StringTrie.fromkeys(('foo.bar', 'foo', 'foo.baz'), 42,
+                                        separator='.')
+        self.assertEqual('.', t._separator)  # pylint: disable=protected-access
+        self.assertEqual(3, len(t))
+        self.assertEqual({'foo': 42, 'foo.bar': 42, 'foo.baz': 42}, dict(t))
+        self.assertTrue(t.has_subtrie('foo'))
+
+        class LowerTrie(pygtrie.StringTrie):
+            __slots__ = ()
+
+            def _path_from_key(self, key):
+                return key.lower().split(self._separator)
+
+        t = LowerTrie.fromkeys(['Foo/Bar'], 42)
+        self.assertEqual(['foo/bar'], t.keys())
+
     def test_invalid_separator(self):
         self.assertRaises(TypeError, pygtrie.StringTrie, separator=42)
         self.assertRaises(ValueError, pygtrie.StringTrie, separator='')
 
 
+class ChildrenTest(unittest.TestCase):
+    """Tests nodes' children behave like dictionaries regardless of count."""
+
+    def test_nan_step(self):
+        nan = float('nan')
+        t = pygtrie.Trie()
+        t[(nan, 1)] = 1
+        t[(nan, 2)] = 2
+        self.assertEqual(2, len(t))
+        self.assertEqual(1, t[(nan, 1)])
+        self.assertEqual(2, t[(nan, 2)])
+        self.assertEqual([1, 2], sorted(t.values()))
+
+    def test_unhashable_step(self):
+        t = pygtrie.Trie()
+        self.assertRaises(TypeError, t.__setitem__, ([1],), 1)
+        self.assertEqual(0, len(t))
+
+        t[(1,)] = 1
+        self.assertRaises(TypeError, t.__setitem__, ([2],), 2)
+        self.assertEqual(1, len(t))
+        self.assertEqual(1, t[(1,)])
+        t[(2,)] = 2
+        self.assertEqual({(1,): 1, (2,): 2}, dict(t.items()))
+
+        # Look-ups raise regardless of how many children the root has.
+        key = ([1],)
+        t = pygtrie.Trie()
+        for n in range(3):
+            if n:
+                t[(n,)] = n
+            self.assertRaises(TypeError, t.__contains__, key)
+            self.assertRaises(TypeError, t.get, key)
+            self.assertRaises(TypeError, t.has_node, key)
+            self.assertRaises(TypeError, t.__getitem__, key)
+            self.assertRaises(TypeError, t.has_subtrie, key)
+            self.assertRaises(TypeError, t.shortest_prefix, key)
+            ps = pygtrie.PrefixSet(t)
+            self.assertRaises(TypeError, ps.__contains__, key)
+
+
 class SortTest(unittest.TestCase):
 
     def test_enable_sorting(self):
@@ -579,12 +862,14 @@ class RecursionTest(unittest.TestCase):
     @staticmethod
     def create_trie():
         tostring = (getattr(array.array, 'tobytes', None) or # Python 3
-                    getattr(array.array, 'tostring'))  # Python 3
+                    getattr(array.array, 'tostring'))  # Python 2
 
+        # Each key is a suffix of the same buffer; slicing it is cheaper than
+        # building a new array for every key.
+        data = tostring(array.array('h', range(1000)))
+        step = array.array('h').itemsize
         trie = pygtrie.Trie()
-        for x in range(100):
-            y = tostring(array.array('h', range(x, 1000)))
-            trie.update([(y, x)])
+        trie.update((data[x * step:], x) for x in range(100))
         return trie
 
     def test_iterator(self):